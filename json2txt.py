@@ -1,8 +1,31 @@
 #!/usr/bin/env python3
 """Convert a memories JSON file to readable TXT."""
 import json
+import mmap
+import os
 import sys
-from datetime import datetime
+
+from memexporter import _local_date
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Above this size, orjson parses straight from a read-only mmap of the file
+# instead of a full in-memory copy.
+MMAP_THRESHOLD = 1 << 20
+
+
+def format_date(created):
+    """Epoch seconds -> MM/DD/YYYY; anything else is passed through as text."""
+    if not created:
+        return ""
+    try:
+        return _local_date(int(float(created) // 900))
+    except Exception:
+        return str(created)
+
 
 if len(sys.argv) < 2:
     print("Usage: python json2txt.py memories.json")
@@ -10,27 +33,31 @@ if len(sys.argv) < 2:
     sys.exit(1)
 
 path = sys.argv[1]
-with open(path, "r", encoding="utf-8") as f:
-    data = json.load(f)
+with open(path, "rb") as f:
+    if orjson and os.fstat(f.fileno()).st_size >= MMAP_THRESHOLD:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            data = orjson.loads(view)
+    else:
+        raw = f.read()
+        data = orjson.loads(raw) if orjson else json.loads(raw)
 
 # Handle both raw API response and our export format
-items = data.get("items", data.get("memories", data if isinstance(data, list) else []))
+if isinstance(data, list):
+    items = data
+else:
+    items = data.get("items", data.get("memories", []))
+
+# Build the whole file in memory and write it once
+parts = [None] * (len(items) + 1)
+parts[0] = f"Total: {len(items)}\n" + "=" * 60 + "\n\n"
+for i, m in enumerate(items, 1):
+    content = m.get("result", m.get("content", "(empty)"))
+    mem_type = m.get("summary_type", m.get("type", "unknown")).upper()
+    date_str = format_date(m.get("created_at", m.get("date", "")))
+    parts[i] = f"--- Memory #{i} [{mem_type}] {date_str} ---\n{content}\n\n"
 
 out_path = path.rsplit(".", 1)[0] + ".txt"
 with open(out_path, "w", encoding="utf-8") as f:
-    f.write(f"Total: {len(items)}\n")
-    f.write("=" * 60 + "\n\n")
-    for i, m in enumerate(items, 1):
-        content = m.get("result", m.get("content", "(empty)"))
-        mem_type = m.get("summary_type", m.get("type", "unknown")).upper()
-        created = m.get("created_at", m.get("date", ""))
-        date_str = ""
-        if created:
-            try:
-                date_str = datetime.fromtimestamp(float(created)).strftime("%m/%d/%Y")
-            except Exception:
-                date_str = str(created)
-        f.write(f"--- Memory #{i} [{mem_type}] {date_str} ---\n")
-        f.write(content + "\n\n")
+    f.write("".join(parts))
 
 print(f"Done! {len(items)} memories saved to: {out_path}")
@@ -5,27 +5,96 @@ Exports memories from your Shapes.inc bots via the API.
 """
 
 import argparse
+import asyncio
+import glob
+import gzip
 import json
 import os
 import re
 import sys
-import time
+import tempfile
+from contextlib import asynccontextmanager
 from datetime import datetime
+from functools import lru_cache
 
 try:
-    from playwright.sync_api import sync_playwright
+    import orjson
 except ImportError:
-    print("ERROR: Playwright is not installed.")
-    print("Run: pip install playwright && playwright install chromium")
-    sys.exit(1)
+    orjson = None
 
 DEFAULT_OUTPUT_DIR = "exports"
 DEFAULT_PROFILE_DIR = os.path.expanduser("~/.memexporter-profile")
+DEFAULT_CONCURRENCY = 5
+API_PAGES_IN_FLIGHT = 4  # memory API pages fetched concurrently per shape
+IO_BUFFER_SIZE = 1 << 20  # exports are streamed as many small writes
+
+SHAPES_URL = "https://shapes.inc"
+DASHBOARD_URL = f"{SHAPES_URL}/dashboard"
+LOGIN_URL = "https://talk.shapes.inc/login"
+
+# Page-text markers, matched in the page as JS regex sources; each is a single
+# alternation so one test covers every variant.
+_DASHBOARD_MARKERS = "My Shapes|Create Shape"
+_LOGIN_WALL_MARKERS = "Log in|Sign up"
+_NO_MEMORIES_MARKER = "no memories"
+
+# Evaluated in the page so only a boolean crosses back, not the body text.
+# The marker is baked in as a regex literal (the ready check is polled every
+# animation frame) rather than rebuilt with new RegExp() on each call.
+_DASHBOARD_TEST = "/%s/.test(document.body.innerText)" % _DASHBOARD_MARKERS
+_HAS_DASHBOARD_JS = f"() => {_DASHBOARD_TEST}"
+_DASHBOARD_READY_JS = f"() => {_DASHBOARD_TEST} || location.pathname.includes('/login')"
+# "no memories" is matched case-insensitively (/i); the other markers are exact.
+_FAILURE_REASON_JS = """() => {
+  const t = document.body.innerText;
+  return /%s/.test(t) ? "login" : /%s/i.test(t) ? "empty" : null;
+}""" % (_LOGIN_WALL_MARKERS, _NO_MEMORIES_MARKER)
+
+# Anything but alphanumerics and "-_ " becomes "_" in file names; \w is exactly
+# str.isalnum() plus "_".
+_UNSAFE_NAME_RE = re.compile(r"[^\w\- ]")
+
+# Every response URL on the memory page goes through this; one compiled scan
+# classifies it as the memory API call, the shape-info call, an avatar, or none.
+_UUID_SOURCE_RE = re.compile(
+    r"/api/memory/(?P<memory>[a-f0-9-]+)[^?]*\?"
+    r"|(?P<info>/api/shapes/username/)"
+    r"|avatar_(?P<avatar>[a-f0-9-]{36})")
+
+# Fallback for _fetch_json: the same request issued by the page itself, for
+# when the server refuses one made outside the browser.
+_FETCH_JSON_JS = """async (url) => {
+    const r = await fetch(url, {credentials: "include"});
+    return {status: r.status, data: r.ok ? await r.json() : null};
+}"""
+
+
+def _require_playwright():
+    """Import Playwright on first use so --help doesn't pay for it."""
+    try:
+        from playwright.async_api import async_playwright
+    except ImportError:
+        print("ERROR: Playwright is not installed.")
+        print("Run: pip install playwright && playwright install chromium")
+        sys.exit(1)
+    return async_playwright
 
 
-def find_browser():
-    """Find a system Chromium/Chrome executable."""
+def find_browser(cache_path=None):
+    """Find a system Chromium/Chrome executable.
+
+    A path remembered in `cache_path` (see _remember_browser) is used as long as
+    it is still executable.
+    """
     import shutil, platform
+    if cache_path:
+        try:
+            with open(cache_path, encoding="utf-8") as f:
+                cached = f.read().strip()
+            if cached and os.access(cached, os.X_OK):
+                return cached
+        except OSError:
+            pass
     for c in ("chromium", "chromium-browser", "google-chrome", "google-chrome-stable"):
         found = shutil.which(c)
         if found:
@@ -35,295 +104,474 @@ def find_browser():
     win = [os.path.expandvars(r"%ProgramFiles%\Google\Chrome\Application\chrome.exe"),
            os.path.expandvars(r"%ProgramFiles(x86)%\Google\Chrome\Application\chrome.exe"),
            os.path.expandvars(r"%LocalAppData%\Google\Chrome\Application\chrome.exe")]
-    paths = mac if platform.system() == "Darwin" else win if platform.system() == "Windows" else []
+    system = platform.system()
+    paths = mac if system == "Darwin" else win if system == "Windows" else []
     for p in paths:
         if os.path.exists(p):
             return p
-    try:
+    # Playwright's bundled browser sits at a fixed depth under its per-OS
+    # cache; a few globs for this platform, no tree walk
+    if system == "Darwin":
+        pw_browsers = os.path.expanduser("~/Library/Caches/ms-playwright")
+        # Newer Playwright installs Chrome for Testing instead of Chromium.app
+        patterns = ("chromium-*/chrome-mac*/Google Chrome for Testing.app/Contents/MacOS/"
+                    "Google Chrome for Testing",
+                    "chromium-*/chrome-mac*/Chromium.app/Contents/MacOS/Chromium")
+    elif system == "Windows":
+        pw_browsers = os.path.expandvars(r"%LocalAppData%\ms-playwright")
+        patterns = ("chromium-*/chrome-win*/chrome.exe",)
+    else:
         pw_browsers = os.path.expanduser("~/.cache/ms-playwright")
-        if os.path.exists(pw_browsers):
-            for root, dirs, files in os.walk(pw_browsers):
-                for f in files:
-                    if f in ("chromium", "chrome", "chrome.exe"):
-                        full = os.path.join(root, f)
-                        if os.access(full, os.X_OK):
-                            return full
-    except Exception:
-        pass
+        patterns = ("chromium-*/chrome-linux*/chrome",)
+    custom = os.environ.get("PLAYWRIGHT_BROWSERS_PATH")
+    if custom and custom != "0":  # "0" means inside the playwright package
+        pw_browsers = custom
+    for pattern in patterns:
+        for full in glob.glob(os.path.join(pw_browsers, pattern)):
+            if os.access(full, os.X_OK):
+                return full
     return None
 
 
-def _launch_browser(p, profile, browser_path):
-    """Launch Chromium with persistent context. Returns (context, page)."""
+def _remember_browser(cache_path, browser_path):
+    """Store a browser that launched fine so find_browser can skip the search."""
+    try:
+        with open(cache_path, "w", encoding="utf-8") as f:
+            f.write(browser_path)
+    except OSError:
+        pass
+
+
+def _load_shape_ids(path):
+    """Shape name -> UUID map saved by earlier runs ({} if missing or unreadable)."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            ids = json.load(f)
+        return ids if isinstance(ids, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_shape_ids(path, ids):
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(ids, f, indent=2)
+    except OSError:
+        pass
+
+
+@asynccontextmanager
+async def _browser(p, profile, browser_path):
+    """Launch Chromium with a persistent context; yields (context, page).
+
+    The context is closed on the way out, including on errors and Ctrl-C.
+    """
     kwargs = {
         "headless": False,
         "viewport": {"width": 1280, "height": 900},
-        "args": ["--disable-blink-features=AutomationControlled"],
+        # Playwright already passes --disable-extensions, --no-first-run,
+        # --disable-background-networking, --disable-sync and friends
+        "args": ["--disable-blink-features=AutomationControlled",
+                 "--disable-gpu", "--disable-dev-shm-usage"],
         "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
     }
     if browser_path:
         kwargs["executable_path"] = browser_path
-    ctx = p.chromium.launch_persistent_context(profile, **kwargs)
-    pg = ctx.pages[0] if ctx.pages else ctx.new_page()
-    return ctx, pg
+    ctx = await p.chromium.launch_persistent_context(profile, **kwargs)
+    try:
+        pg = ctx.pages[0] if ctx.pages else await ctx.new_page()
+        yield ctx, pg
+    finally:
+        try:
+            await ctx.close()
+        except Exception:
+            pass
 
 
-def do_login(p, profile, browser_path):
-    """Handle the login flow. Returns True if login succeeded."""
+async def do_login(ctx, pg, fresh=False):
+    """Handle the login flow in the open browser. Returns True if login succeeded.
+
+    With fresh=True the saved cookies are cleared first, forcing a new login.
+    """
     print("\n" + "=" * 50)
     print("  Step 1: Log in to Shapes.inc")
     print("=" * 50)
     print()
-    print("  A browser window will open.")
-    print("  Log in with your Shapes.inc account.")
+    print("  Log in with your Shapes.inc account in the browser window.")
     print("  The script will detect when you're done.")
     print()
-    os.makedirs(profile, exist_ok=True)
-    ctx, pg = _launch_browser(p, profile, browser_path)
-    pg.goto("https://talk.shapes.inc/login", timeout=60000)
+    if fresh:
+        await ctx.clear_cookies()
+    await pg.goto(LOGIN_URL, timeout=60000)
     print("  [*] Waiting for you to log in...")
     logged_in = False
-    for _ in range(600):
-        time.sleep(1)
-        try:
-            if "/login" not in pg.url and "auth." not in pg.url:
-                logged_in = True
-                break
-        except Exception:
-            break
+    try:
+        await pg.wait_for_url(lambda u: "/login" not in u and "auth." not in u, timeout=600000)
+        logged_in = True
+    except Exception:
+        pass
     if not logged_in:
         print("  [!] Login timed out or failed.")
-        ctx.close()
         return False
     print("  [+] Login successful!")
     print("  [*] Syncing session...")
-    for url in ["https://shapes.inc", "https://shapes.inc/dashboard"]:
-        try:
-            pg.goto(url, timeout=30000)
-            time.sleep(4)
-        except Exception:
-            pass
-    body = pg.inner_text("body")
-    if "My Shapes" in body or "Create Shape" in body:
+    try:
+        # Let shapes.inc finish its cookie handoff before leaving the page
+        await pg.goto(SHAPES_URL, wait_until="domcontentloaded", timeout=30000)
+        await pg.wait_for_load_state("networkidle", timeout=10000)
+    except Exception:
+        pass
+    try:
+        # The dashboard marker itself is the ready signal; no idle wait needed
+        await pg.goto(DASHBOARD_URL, wait_until="domcontentloaded", timeout=30000)
+        await pg.wait_for_function(_HAS_DASHBOARD_JS, timeout=10000)
         print("  [+] Session verified!")
-    else:
+    except Exception:
         print("  [!] Warning: session may not be fully synced.")
-    ctx.close()
     return True
 
 
-def is_logged_in(p, profile, browser_path):
-    """Quick check if we have a valid session."""
-    if not os.path.exists(profile):
-        return False
+async def is_logged_in(ctx, pg):
+    """Quick check if the open browser has a valid session."""
     try:
-        ctx, pg = _launch_browser(p, profile, browser_path)
-        pg.goto("https://shapes.inc/dashboard", timeout=30000)
-        time.sleep(6)
-        body = pg.inner_text("body")
-        url = pg.url
-        logged = ("My Shapes" in body or "Create Shape" in body) and "/login" not in url
-        ctx.close()
-        return logged
-    except Exception:
+        # No shapes.inc cookies at all can't be a session; skip the page load
+        if not await ctx.cookies(SHAPES_URL):
+            return False
+        await pg.goto(DASHBOARD_URL, wait_until="domcontentloaded", timeout=30000)
         try:
-            ctx.close()
+            await pg.wait_for_function(_DASHBOARD_READY_JS, timeout=15000)
         except Exception:
             pass
+        return "/login" not in pg.url and await pg.evaluate(_HAS_DASHBOARD_JS)
+    except Exception:
         return False
 
 
+def _shape_segment(url):
+    """Return the path segment after "shapes.inc/", or None."""
+    i = url.find("shapes.inc/")
+    if i < 0:
+        return None
+    return url[i + 11:].partition("/")[0] or None
+
+
 def url_to_memory_url(url):
-    if not url.startswith("http"):
+    if not url.startswith(("http://", "https://")):
         url = f"https://{url}"
     if "/user/memory" in url:
         return url
-    match = re.search(r"shapes\.inc/([^/]+)", url)
-    if match:
-        return f"https://shapes.inc/{match.group(1)}/user/memory"
+    shape = _shape_segment(url)
+    if shape:
+        return f"{SHAPES_URL}/{shape}/user/memory"
     return url
 
 
 def url_to_shape_name(url):
-    match = re.search(r"shapes\.inc/([^/]+)", url)
-    return match.group(1) if match else "unknown_shape"
+    return _shape_segment(url) or "unknown_shape"
 
 
-def get_shape_uuid(page, memory_url):
+async def get_shape_uuid(page, memory_url):
     """Navigate to memory page and intercept the API call to get the shape UUID."""
     shape_uuid = None
     shape_uuid_fallback = None
+    found = asyncio.Event()
+    fallback_found = asyncio.Event()
 
-    def on_response(response):
+    async def on_response(response):
         nonlocal shape_uuid, shape_uuid_fallback
-        url = response.url
+        if shape_uuid:
+            return  # later page requests can't improve on the memory API UUID
+        match = _UUID_SOURCE_RE.search(response.url)
+        if not match:
+            return
         # Primary: intercept the memory API call directly
-        if "/api/memory/" in url and "?" in url:
-            match = re.search(r"/api/memory/([a-f0-9-]+)", url)
-            if match:
-                shape_uuid = match.group(1)
+        if match.group("memory"):
+            shape_uuid = match.group("memory")
+            found.set()
         # Fallback: get UUID from shape info or avatar URLs
-        if not shape_uuid and not shape_uuid_fallback:
-            if "/api/shapes/username/" in url:
+        elif not shape_uuid_fallback:
+            if match.group("info"):
+                # Only read the body of a successful JSON reply
+                if response.status != 200 or "json" not in response.headers.get("content-type", ""):
+                    return
                 try:
-                    data = response.json()
+                    data = await response.json()
                     shape_uuid_fallback = data.get("id") or data.get("shape_id") or data.get("uuid")
                 except Exception:
                     pass
-            elif "avatar_" in url:
-                match = re.search(r"avatar_([a-f0-9-]{36})", url)
-                if match:
-                    shape_uuid_fallback = match.group(1)
+            else:
+                shape_uuid_fallback = match.group("avatar")
+            if shape_uuid_fallback:
+                fallback_found.set()
+
+    async def fallback_settled():
+        # Give the memory API call a short grace period to beat the fallback
+        await fallback_found.wait()
+        await asyncio.sleep(10)
 
     page.on("response", on_response)
 
     for attempt in range(2):
         if attempt > 0:
             print("  [*] Retrying...")
-        page.goto(memory_url, timeout=60000)
+        await page.goto(memory_url, wait_until="domcontentloaded", timeout=60000)
+        # The memory API call is all we need; don't wait for the page UI to
+        # finish rendering once it has been seen.
+        waiters = [asyncio.ensure_future(found.wait()), asyncio.ensure_future(fallback_settled())]
         try:
-            page.wait_for_selector("text=User Memory", timeout=30000)
-        except Exception:
-            pass
-        for _ in range(10):
-            if shape_uuid:
-                break
-            time.sleep(1)
-        if shape_uuid:
+            await asyncio.wait(waiters, timeout=40, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+        if shape_uuid or shape_uuid_fallback:
             break
 
     page.remove_listener("response", on_response)
     return shape_uuid or shape_uuid_fallback
 
 
-def fetch_memories_via_api(context, shape_uuid):
-    """Fetch all memories using the API endpoint."""
-    all_memories = []
-    page_num = 1
-
-    while True:
-        api_url = f"https://shapes.inc/api/memory/{shape_uuid}?page={page_num}&limit=1000"
-        print(f"  [*] Fetching page {page_num} via API...", end="")
-        api_page = context.new_page()
+def _extract_items(data):
+    """Return the flat list of memory entries from an API response."""
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict):
+        for key in ("items", "memories", "data"):
+            entries = data.get(key)
+            if isinstance(entries, list):
+                return entries
+        return [data]
+    return []
+
+
+async def _fetch_json(page, url, in_page=False):
+    """GET a JSON API URL with the context's cookies. Returns (status, data).
+
+    By default this goes through the context's request client, which skips the
+    renderer entirely; with in_page=True the page's own fetch() is used.
+    """
+    if in_page:
+        result = await page.evaluate(_FETCH_JSON_JS, url)
+        return result["status"], result["data"]
+    response = await page.context.request.get(url, timeout=60000)
+    if not response.ok:
+        return response.status, None
+    body = await response.body()
+    return response.status, orjson.loads(body) if orjson else json.loads(body)
+
+
+async def fetch_memories_via_api(page, shape_uuid, shape_name, spool):
+    """Fetch all memories using the API endpoint (from within the shape's tab).
+
+    Each new memory is appended to `spool` as one JSON line as its page
+    arrives; only content hashes stay in memory. Returns the count written.
+    """
+    seen = set()  # content hashes: ints, not full memory texts
+    in_page = False
+    known_pages = None  # total_pages, once page 1 has reported it
+
+    async def get_page(num):
+        nonlocal in_page
+        api_url = f"{SHAPES_URL}/api/memory/{shape_uuid}?page={num}&limit=1000"
         try:
-            resp = api_page.goto(api_url, timeout=30000)
-            if resp.status != 200:
-                print(f" error {resp.status}")
-                api_page.close()
-                break
-            raw = api_page.inner_text("body")
-            data = json.loads(raw)
-            api_page.close()
+            status, data = await _fetch_json(page, api_url, in_page)
+            if status in (401, 403) and not in_page:
+                in_page = True  # stay in the page for the remaining pages
+                status, data = await _fetch_json(page, api_url, in_page)
         except Exception as e:
-            print(f" error: {e}")
-            try:
-                api_page.close()
-            except Exception:
-                pass
+            print(f"  [!] {shape_name}: API page {num} error: {e}")
+            return None
+        if status != 200:
+            print(f"  [!] {shape_name}: API page {num} error {status}")
+            return None
+        return data
+
+    page_num = 1
+    while True:
+        # With a known page count, fetch a few pages at once; they are still
+        # processed and spooled in order. Without one, probe page by page.
+        batch = 1 if known_pages is None else max(1, min(API_PAGES_IN_FLIGHT,
+                                                          known_pages - page_num + 1))
+        results = await asyncio.gather(*(get_page(n) for n in range(page_num, page_num + batch)))
+        if not _spool_pages(results, page_num, seen, spool, shape_name):
             break
+        if known_pages is None and isinstance(results[0], dict):
+            known_pages = results[0].get("pagination", {}).get("total_pages")
+        page_num += batch
+
+    return len(seen)
+
+
+@lru_cache(maxsize=4096)
+def _local_date(block):
+    """MM/DD/YYYY for a 15-minute block of epoch time (block = seconds // 900).
+
+    Modern UTC offsets are all whole quarter hours, so local midnight falls on a
+    block boundary and the whole block shares one date; memories written
+    together format once. (Some pre-1970 local-mean-time offsets, e.g. old
+    America/St_Johns or Europe/Amsterdam, are not, and may bucket wrongly.)
+    """
+    return datetime.fromtimestamp(block * 900).strftime("%m/%d/%Y")
+
 
-        entries = data if isinstance(data, list) else data.get("items", data.get("memories", data.get("data", [])))
-        if isinstance(data, dict) and not isinstance(entries, list):
-            entries = [data]
-        if isinstance(data, list):
-            entries = data
+def _spool_pages(results, page_num, seen, spool, shape_name):
+    """Write consecutive API pages, starting at page_num, to the spool.
 
-        page_memories = []
-        items = entries if isinstance(entries, list) else [entries]
-        for entry in items:
+    Returns False once paging is over (error, last page, or a repeated page).
+    """
+    for data in results:
+        if data is None:
+            return False
+        page_count = 0
+        for entry in _extract_items(data):
             if not isinstance(entry, dict):
                 continue
             content = entry.get("result", entry.get("content", ""))
             if not content:
                 continue
+            page_count += 1
+            key = hash(content)
+            if key in seen:
+                continue
+            seen.add(key)
             summary_type = entry.get("summary_type", "unknown")
             created = entry.get("created_at", "")
             date_str = ""
             if created:
                 try:
-                    dt = datetime.fromtimestamp(float(created))
-                    date_str = dt.strftime("%m/%d/%Y")
+                    date_str = _local_date(int(float(created) // 900))
                 except Exception:
                     date_str = str(created)
-            page_memories.append({"type": summary_type, "content": content, "date": date_str})
-
-        print(f" {len(page_memories)} memories")
-        all_memories.extend(page_memories)
+            spool.write(_dumps({"type": summary_type, "content": content, "date": date_str}) + "\n")
 
         pagination = data.get("pagination", {}) if isinstance(data, dict) else {}
         has_next = pagination.get("has_next", False)
-        total = pagination.get("total", len(all_memories))
         total_pages = pagination.get("total_pages", 1)
-        if total_pages > 1:
-            print(f"  [*] Total: {total} memories across {total_pages} page(s)")
-        if not has_next or not page_memories:
-            break
+        # One line per page; the overall total only once, with page 1
+        if page_num == 1 and total_pages > 1:
+            total = pagination.get("total", len(seen))
+            print(f"  [*] {shape_name}: page 1/{total_pages} -> {page_count} memories "
+                  f"({total} total)")
+        else:
+            print(f"  [*] {shape_name}: page {page_num}/{total_pages} -> {page_count} memories")
+        # Past the reported last page the API can only repeat itself, even if
+        # has_next still says otherwise
+        last_page = pagination.get("total_pages")
+        if not has_next or not page_count or (last_page and page_num >= last_page):
+            return False
         page_num += 1
+    return True
 
-    return all_memories
 
+def _dumps(obj, pretty=False):
+    """JSON-encode to str (orjson when available, else the stdlib)."""
+    if orjson:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0).decode("utf-8")
+    return json.dumps(obj, indent=2 if pretty else None, ensure_ascii=False,
+                      default=datetime.isoformat)
 
-def export_memories(memories, shape_name, output_dir):
-    """Export memories to JSON and TXT files."""
-    os.makedirs(output_dir, exist_ok=True)
-    safe_name = "".join(c if c.isalnum() or c in "-_ " else "_" for c in shape_name).strip()
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-
-    seen = set()
-    unique = []
-    for m in memories:
-        key = m.get("content", "")
-        if key and key not in seen:
-            seen.add(key)
-            unique.append(m)
 
-    json_path = os.path.join(output_dir, f"{safe_name}_{timestamp}.json")
-    with open(json_path, "w", encoding="utf-8") as f:
-        json.dump({"shape": shape_name, "exported_at": datetime.now().isoformat(),
-                    "count": len(unique), "memories": unique}, f, indent=2, ensure_ascii=False)
+def export_memories(spool_path, count, shape_name, output_dir):
+    """Export the spooled (already-deduplicated) memories to JSON and TXT files.
+
+    Streams the JSON-lines spool written by fetch_memories_via_api, so only
+    one memory is held at a time.
+    """
+    safe_name = _UNSAFE_NAME_RE.sub("_", shape_name).strip()
+    now = datetime.now()
+    timestamp = now.strftime("%Y%m%d_%H%M%S")
+    loads = orjson.loads if orjson else json.loads
 
+    json_path = os.path.join(output_dir, f"{safe_name}_{timestamp}.json")
     txt_path = os.path.join(output_dir, f"{safe_name}_{timestamp}.txt")
-    with open(txt_path, "w", encoding="utf-8") as f:
-        f.write(f"Memories for: {shape_name}\n")
-        f.write(f"Exported: {datetime.now().isoformat()}\n")
-        f.write(f"Total: {len(unique)}\n")
-        f.write("=" * 60 + "\n\n")
-        for i, m in enumerate(unique, 1):
-            mem_type = m.get("type", "unknown").upper()
-            mem_date = m.get("date", "")
-            f.write(f"--- Memory #{i} [{mem_type}] {mem_date} ---\n")
-            f.write(m.get("content", "(empty)") + "\n\n")
-
-    return json_path, txt_path, len(unique)
-
-
-def export_shape(page, context, url, output_dir, debug=False):
-    """Export memories from a single shape URL. Returns count exported."""
+    head = _dumps({"shape": shape_name, "exported_at": now, "count": count}, pretty=True)
+    with open(spool_path, encoding="utf-8", buffering=IO_BUFFER_SIZE) as spool, \
+            open(json_path, "w", encoding="utf-8", buffering=IO_BUFFER_SIZE) as jf, \
+            open(txt_path, "w", encoding="utf-8", buffering=IO_BUFFER_SIZE) as tf:
+        # Same layout as dumping the whole payload with indent=2
+        jf.write(head[:-2] + ',\n  "memories": [')
+        tf.write(f"Memories for: {shape_name}\n"
+                 f"Exported: {now.isoformat()}\n"
+                 f"Total: {count}\n" + "=" * 60 + "\n\n")
+        sep = "\n    "
+        for i, line in enumerate(spool, 1):
+            m = loads(line)
+            jf.write(sep + _dumps(m, pretty=True).replace("\n", "\n    "))
+            sep = ",\n    "
+            tf.write(f"--- Memory #{i} [{m['type'].upper()}] {m['date']} ---\n"
+                     f"{m['content']}\n\n")
+        jf.write("\n  ]\n}")
+
+    return json_path, txt_path, count
+
+
+async def _write_debug(page, shape_name, output_dir):
+    """Save the page's HTML, gzipped, for troubleshooting (--debug only)."""
+    debug_path = os.path.join(output_dir, f"{shape_name}_debug.html.gz")
+    with gzip.open(debug_path, "wt", encoding="utf-8", compresslevel=6) as f:
+        f.write(await page.content())
+    print(f"  [*] Debug HTML saved: {debug_path}")
+
+
+async def _fetch_and_export(page, shape_uuid, shape_name, output_dir):
+    """Spool a shape's memories and write its JSON/TXT files. Returns count exported."""
+    spool = tempfile.NamedTemporaryFile("w", buffering=IO_BUFFER_SIZE, encoding="utf-8",
+                                        prefix="memexporter_", suffix=".jsonl",
+                                        delete=False)
+    try:
+        with spool:
+            count = await fetch_memories_via_api(page, shape_uuid, shape_name, spool)
+        if count:
+            loop = asyncio.get_running_loop()
+            json_path, txt_path, count = await loop.run_in_executor(
+                None, export_memories, spool.name, count, shape_name, output_dir)
+            print(f"\n  [+] {shape_name}: exported {count} memories!")
+            print(f"      JSON: {json_path}")
+            print(f"      TXT:  {txt_path}")
+        return count
+    finally:
+        try:
+            os.remove(spool.name)
+        except OSError:
+            pass
+
+
+async def export_shape(page, url, output_dir, debug=False, shape_ids=None):
+    """Export memories from a single shape URL. Returns count exported.
+
+    `shape_ids` maps shape names to UUIDs from earlier runs; a known UUID skips
+    loading the memory page, and newly found ones are added to it.
+    """
     memory_url = url_to_memory_url(url)
     shape_name = url_to_shape_name(url)
+    if shape_ids is None:
+        shape_ids = {}
 
     print(f"\n  [*] Shape: {shape_name}")
     print(f"  [*] URL:   {memory_url}")
-    print(f"  [*] Navigating...")
 
-    shape_uuid = get_shape_uuid(page, memory_url)
+    cached_uuid = shape_ids.get(shape_name)
+    if cached_uuid:
+        print(f"  [+] {shape_name}: using saved shape ID {cached_uuid[:8]}...")
+        count = await _fetch_and_export(page, cached_uuid, shape_name, output_dir)
+        if count:
+            return count
+        # Stale, refused off-page, or a transient error: look the UUID up on the
+        # memory page and retry from there, even if it turns out unchanged
+
+    shape_uuid = await get_shape_uuid(page, memory_url)
 
     if shape_uuid:
-        print(f"  [+] Found shape ID: {shape_uuid[:8]}...")
-        print(f"  [*] Fetching memories via API...")
-        memories = fetch_memories_via_api(context, shape_uuid)
-        if memories:
-            json_path, txt_path, count = export_memories(memories, shape_name, output_dir)
-            print(f"\n  [+] Exported {count} memories!")
-            print(f"      JSON: {json_path}")
-            print(f"      TXT:  {txt_path}")
+        print(f"  [+] {shape_name}: found shape ID {shape_uuid[:8]}...")
+        count = await _fetch_and_export(page, shape_uuid, shape_name, output_dir)
+        if count:
+            shape_ids[shape_name] = shape_uuid
             return count
 
-    print("  [!] Could not fetch memories.")
-    body = page.inner_text("body")
-    if "Log in" in body or "Sign up" in body:
+    print(f"  [!] {shape_name}: could not fetch memories.")
+    reason = await page.evaluate(_FAILURE_REASON_JS)
+    if reason == "login":
         print("  [!] You're not logged in. Run the script again.")
-    elif "No memories" in body or "no memories" in body:
+    elif reason == "empty":
         print("  [!] This shape has no memories yet.")
     else:
         print("  [!] Possible causes:")
@@ -331,18 +579,42 @@ def export_shape(page, context, url, output_dir, debug=False):
         print("      - You don't have access to this shape's memories")
         print("      - The page took too long to load (try again)")
     if debug:
-        debug_path = os.path.join(output_dir, f"{shape_name}_debug.html")
-        os.makedirs(output_dir, exist_ok=True)
-        with open(debug_path, "w", encoding="utf-8") as f:
-            f.write(page.content())
-        print(f"  [*] Debug HTML saved: {debug_path}")
+        await _write_debug(page, shape_name, output_dir)
     return 0
 
 
-def interactive_flow(args):
+async def export_all(ctx, urls, output_dir, debug=False, concurrency=DEFAULT_CONCURRENCY,
+                     shape_ids=None):
+    """Export several shapes concurrently, one tab per shape. Returns [(name, count)]."""
+    os.makedirs(output_dir, exist_ok=True)
+    sem = asyncio.Semaphore(max(1, concurrency))
+
+    async def worker(raw_url):
+        async with sem:
+            page = await ctx.new_page()
+            try:
+                return await export_shape(page, raw_url, output_dir, debug=debug,
+                                          shape_ids=shape_ids)
+            except Exception as e:
+                print(f"  [!] {url_to_shape_name(raw_url)}: export failed: {e}")
+                return 0
+            finally:
+                try:
+                    await page.close()
+                except Exception:
+                    pass
+
+    counts = await asyncio.gather(*(worker(u) for u in urls))
+    return [(url_to_shape_name(u), c) for u, c in zip(urls, counts)]
+
+
+async def interactive_flow(args):
     """Guided interactive mode."""
+    async_playwright = _require_playwright()
     profile = args.profile or DEFAULT_PROFILE_DIR
-    browser_path = args.browser_path or find_browser()
+    # Kept inside the profile so it is only written once a launch succeeded
+    browser_cache = os.path.join(profile, "memexporter-browser-path")
+    browser_path = args.browser_path or find_browser(browser_cache)
 
     print()
     print("=" * 50)
@@ -354,60 +626,83 @@ def interactive_flow(args):
         print("  [!] Install one, or use --browser-path /path/to/chrome")
         sys.exit(1)
 
-    print("\n  [*] Checking if you're already logged in...")
-    with sync_playwright() as p:
-        logged = is_logged_in(p, profile, browser_path)
+    # One driver and one browser serve the login check, login and export
+    async with async_playwright() as p:
+        had_profile = os.path.exists(profile)
+        async with _browser(p, profile, browser_path) as (ctx, pg):
+            if not args.browser_path:
+                _remember_browser(browser_cache, browser_path)
+            await _run_session(args, ctx, pg, had_profile)
+
+
+async def _run_session(args, ctx, pg, had_profile):
+    """Login check, URL prompt and export, all in one open browser."""
+    if args.fresh_login:
+        print("\n  [*] Ignoring the saved session (--fresh-login).")
+        logged = False
+    elif not had_profile:
+        logged = False
+    else:
+        print("\n  [*] Checking if you're already logged in...")
+        logged = await is_logged_in(ctx, pg)
 
     if logged:
         print("  [+] You're logged in!")
     else:
-        print("  [!] Not logged in yet.")
-        with sync_playwright() as p:
-            if not do_login(p, profile, browser_path):
-                print("\n  [!] Could not log in. Please try again.")
-                sys.exit(1)
+        if not args.fresh_login:
+            print("  [!] Not logged in yet.")
+        if not await do_login(ctx, pg, fresh=args.fresh_login):
+            print("\n  [!] Could not log in. Please try again.")
+            sys.exit(1)
+
+    urls = list(args.urls) if args.urls else _prompt_urls()
+    if not urls:
+        print("  [!] No URLs provided.")
+        sys.exit(0)
+    await _export_and_report(ctx, urls, args)
+
+    # Interactive runs keep the browser warm for further batches instead of
+    # paying for a new launch and login check per export.
+    while not args.urls:
+        urls = _prompt_urls(again=True)
+        if not urls:
+            break
+        await _export_and_report(ctx, urls, args)
+
 
+def _prompt_urls(again=False):
     print("\n" + "=" * 50)
-    print("  Step 2: Choose shapes to export")
+    print("  Export more shapes" if again else "  Step 2: Choose shapes to export")
     print("=" * 50)
     print()
     print("  Paste your memory URL (e.g. shapes.inc/your-shape/user/memory)")
     print()
 
-    urls = list(args.urls) if args.urls else []
-    if not urls:
-        while True:
-            url = input("  Paste a memory URL (or press Enter to finish): ").strip()
-            if not url:
-                break
-            if "shapes.inc" not in url and not url.startswith("http"):
-                print("  [!] That doesn't look like a shapes.inc URL. Try again.")
-                continue
-            urls.append(url)
-            print(f"  [+] Added: {url_to_shape_name(url)}")
-            print()
+    urls = []
+    while True:
+        url = input("  Paste a memory URL (or press Enter to finish): ").strip()
+        if not url:
+            break
+        if "shapes.inc" not in url and not url.startswith("http"):
+            print("  [!] That doesn't look like a shapes.inc URL. Try again.")
+            continue
+        urls.append(url)
+        print(f"  [+] Added: {url_to_shape_name(url)}")
+        print()
+    return urls
 
-    if not urls:
-        print("  [!] No URLs provided.")
-        sys.exit(0)
 
+async def _export_and_report(ctx, urls, args):
     print("\n" + "=" * 50)
     print(f"  Step 3: Exporting memories ({len(urls)} shape(s))")
     print("=" * 50)
 
-    with sync_playwright() as p:
-        ctx, page = _launch_browser(p, profile, browser_path)
-        total_exported = 0
-        results = []
-        for i, raw_url in enumerate(urls, 1):
-            print(f"\n  --- Shape {i}/{len(urls)} ---")
-            count = export_shape(page, ctx, raw_url, args.output, debug=args.debug)
-            total_exported += count
-            results.append((url_to_shape_name(raw_url), count))
-        try:
-            ctx.close()
-        except Exception:
-            pass
+    ids_path = os.path.join(args.profile or DEFAULT_PROFILE_DIR, "memexporter-shape-ids.json")
+    shape_ids = _load_shape_ids(ids_path)
+    results = await export_all(ctx, urls, args.output, debug=args.debug,
+                               concurrency=args.concurrency, shape_ids=shape_ids)
+    _save_shape_ids(ids_path, shape_ids)
+    total_exported = sum(count for _, count in results)
 
     print("\n" + "=" * 50)
     print("  All done!")
@@ -429,8 +724,11 @@ def main():
     parser.add_argument("--debug", action="store_true", help="Save page HTML for debugging")
     parser.add_argument("--browser-path", help="Path to Chrome/Chromium")
     parser.add_argument("--profile", default=None, help=f"Browser profile dir (default: {DEFAULT_PROFILE_DIR})")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"Shapes to export at once (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument("--fresh-login", action="store_true", help="Ignore the saved session and log in again")
     args = parser.parse_args()
-    interactive_flow(args)
+    asyncio.run(interactive_flow(args))
 
 
 if __name__ == "__main__":